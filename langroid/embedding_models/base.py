@@ -13,6 +13,7 @@ class EmbeddingModelsConfig(BaseSettings):
     model_type: str = "openai"
     dims: int = 0
     context_length: int = 512
+    batch_size: int = 500  # max number of texts to embed in a single API call
 
 
 class EmbeddingModel(ABC):
@@ -1,14 +1,48 @@
+import hashlib
+import json
 import os
-from typing import Callable, List
+import sqlite3
+import threading
+from array import array
+from collections import OrderedDict
+from contextlib import closing
+from typing import Callable, Dict, List
 
-import tiktoken
 from dotenv import load_dotenv
 from openai import OpenAI
 
 from langroid.embedding_models.base import EmbeddingModel, EmbeddingModelsConfig
 from langroid.language_models.utils import retry_with_exponential_backoff
-from langroid.mytypes import Embeddings
-from langroid.parsing.utils import batched
+from langroid.mytypes import Embedding, Embeddings
+from langroid.parsing.utils import batched, get_tokenizer
+
+# Optional in-memory LRU cache of embeddings, shared across all OpenAIEmbeddings
+# instances, keyed by "<model_name>:<sha256 of text>". Embeddings are deterministic
+# per model, so repeated texts (e.g. the same query or doc ingested into several
+# vector-stores) don't need another API call. Enabled via `cache_size > 0`;
+# entries are stored as compact float arrays, and handed out as fresh lists.
+_embedding_cache: "OrderedDict[str, array[float]]" = OrderedDict()
+_embedding_cache_lock = threading.Lock()
+
+# Optional on-disk cache (SQLite) with the same keys, which persists across
+# processes, e.g. across pytest runs. Only used when LANGROID_EMBED_CACHE=1;
+# the db location can be changed with LANGROID_EMBED_CACHE_PATH.
+EMBED_CACHE_PATH = ".pytest_cache/embeddings/embeddings.db"
+
+
+def _disk_cache_path() -> str | None:
+    if os.getenv("LANGROID_EMBED_CACHE", "").lower() not in ["1", "true"]:
+        return None
+    return os.getenv("LANGROID_EMBED_CACHE_PATH", EMBED_CACHE_PATH)
+
+
+def _disk_cache_connect(path: str) -> sqlite3.Connection:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, embedding TEXT)"
+    )
+    return conn
 
 
 class OpenAIEmbeddingsConfig(EmbeddingModelsConfig):
@@ -18,6 +52,9 @@ class OpenAIEmbeddingsConfig(EmbeddingModelsConfig):
     organization: str = ""
     dims: int = 1536
     context_length: int = 8192
+    # max embeddings held in the in-memory LRU cache (0 = disabled);
+    # each 1536-dim embedding takes ~12KB
+    cache_size: int = 0
 
 
 class SentenceTransformerEmbeddingsConfig(EmbeddingModelsConfig):
@@ -41,7 +78,7 @@ class OpenAIEmbeddings(EmbeddingModel):
                 """
             )
         self.client = OpenAI(api_key=self.config.api_key)
-        self.tokenizer = tiktoken.encoding_for_model(self.config.model_name)
+        self.tokenizer = get_tokenizer(self.config.model_name)
 
     def truncate_texts(self, texts: List[str]) -> List[List[int]]:
         """
@@ -55,12 +92,67 @@ class OpenAIEmbeddings(EmbeddingModel):
             for text in texts
         ]
 
+    def _cache_key(self, text: str) -> str:
+        text_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return f"{self.config.model_name}:{text_hash}"
+
+    def _cache_lookup(self, keys: List[str]) -> Dict[str, Embedding]:
+        """Get cached embeddings for those keys that are in the LRU cache."""
+        if self.config.cache_size <= 0:
+            return {}
+        found = {}
+        with _embedding_cache_lock:
+            for key in keys:
+                if key in _embedding_cache:
+                    _embedding_cache.move_to_end(key)
+                    found[key] = _embedding_cache[key].tolist()
+        return found
+
+    def _cache_store(self, embeds: Dict[str, Embedding]) -> None:
+        """Add embeddings to the LRU cache, evicting least recently used ones."""
+        if self.config.cache_size <= 0:
+            return
+        with _embedding_cache_lock:
+            for key, embed in embeds.items():
+                _embedding_cache[key] = array("d", embed)
+                _embedding_cache.move_to_end(key)
+            while len(_embedding_cache) > self.config.cache_size:
+                _embedding_cache.popitem(last=False)
+
+    def _disk_cache_lookup(self, keys: List[str]) -> Dict[str, Embedding]:
+        """Get embeddings for those keys that are in the on-disk cache, if enabled."""
+        path = _disk_cache_path()
+        if path is None or len(keys) == 0:
+            return {}
+        found = {}
+        with closing(_disk_cache_connect(path)) as conn:
+            # stay well under sqlite's limit on the number of query parameters
+            for batch in batched(keys, 500):
+                rows = conn.execute(
+                    "SELECT key, embedding FROM embeddings WHERE key IN "
+                    f"({','.join('?' * len(batch))})",
+                    batch,
+                ).fetchall()
+                found.update({key: json.loads(embed) for key, embed in rows})
+        return found
+
+    def _disk_cache_store(self, embeds: Dict[str, Embedding]) -> None:
+        """Add embeddings to the on-disk cache, if enabled."""
+        path = _disk_cache_path()
+        if path is None or len(embeds) == 0:
+            return
+        with closing(_disk_cache_connect(path)) as conn, conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, embedding) VALUES (?, ?)",
+                [(key, json.dumps(embed)) for key, embed in embeds.items()],
+            )
+
     def embedding_fn(self) -> Callable[[List[str]], Embeddings]:
         @retry_with_exponential_backoff
-        def fn(texts: List[str]) -> Embeddings:
+        def embed(texts: List[str]) -> Embeddings:
             tokenized_texts = self.truncate_texts(texts)
             embeds = []
-            for batch in batched(tokenized_texts, 500):
+            for batch in batched(tokenized_texts, self.config.batch_size):
                 result = self.client.embeddings.create(
                     input=batch, model=self.config.model_name
                 )
@@ -68,6 +160,29 @@ class OpenAIEmbeddings(EmbeddingModel):
                 embeds.extend(batch_embeds)
             return embeds
 
+        def fn(texts: List[str]) -> Embeddings:
+            keys = [self._cache_key(text) for text in texts]
+            key2embed = self._cache_lookup(keys)
+            disk_embeds = self._disk_cache_lookup(
+                [k for k in keys if k not in key2embed]
+            )
+            self._cache_store(disk_embeds)
+            key2embed.update(disk_embeds)
+            # only embed (distinct) texts that are not already cached
+            key2text = {k: t for k, t in zip(keys, texts) if k not in key2embed}
+            if len(key2text) > 0:
+                new_embeds = dict(zip(key2text.keys(), embed(list(key2text.values()))))
+                self._cache_store(new_embeds)
+                self._disk_cache_store(new_embeds)
+                key2embed.update(new_embeds)
+            # repeated texts get their own copies, so results don't alias each other
+            embeds: Embeddings = []
+            seen = set()
+            for k in keys:
+                embeds.append(list(key2embed[k]) if k in seen else key2embed[k])
+                seen.add(k)
+            return embeds
+
         return fn
 
     @property
@@ -102,7 +217,7 @@ class SentenceTransformerEmbeddings(EmbeddingModel):
     def embedding_fn(self) -> Callable[[List[str]], Embeddings]:
         def fn(texts: List[str]) -> Embeddings:
             embeds = []
-            for batch in batched(texts, 500):
+            for batch in batched(texts, self.config.batch_size):
                 batch_embeds = self.model.encode(batch, convert_to_numpy=True).tolist()
                 embeds.extend(batch_embeds)
             return embeds
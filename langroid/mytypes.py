@@ -1,7 +1,7 @@
 import hashlib
 import uuid
 from enum import Enum
-from typing import Any, Callable, Dict, List, Union
+from typing import Any, Callable, Dict, List, Optional, Union
 
 from pydantic import BaseModel, Extra
 
@@ -77,16 +77,12 @@ class Document(BaseModel):
         return self.hash_id(str(self))
 
     def id(self) -> str:
-        if (
-            hasattr(self.metadata, "id")
-            and self.metadata.id is not None
-            and self.metadata.id != ""
-        ):
-            return self.metadata.id
-        else:
-            return self._unique_hash_id()
+        # single attribute lookup: this is called per-doc in ingest/lookup loops
+        doc_id: Optional[str] = getattr(self.metadata, "id", None)
+        if doc_id is not None and doc_id != "":
+            return doc_id
+        return self._unique_hash_id()
 
     def __str__(self) -> str:
         # TODO: make metadata a pydantic model to enforce "source"
-        self.metadata.json()
         return f"{self.content} {self.metadata.json()}"
@@ -1,13 +1,13 @@
 from functools import reduce
 from typing import Callable, List
 
-import tiktoken
 from pydantic import BaseSettings
 from pygments import lex
 from pygments.lexers import get_lexer_by_name
 from pygments.token import Token
 
 from langroid.mytypes import Document
+from langroid.parsing.utils import get_tokenizer
 
 
 def chunk_code(
@@ -72,7 +72,7 @@ class CodeParsingConfig(BaseSettings):
 class CodeParser:
     def __init__(self, config: CodeParsingConfig):
         self.config = config
-        self.tokenizer = tiktoken.encoding_for_model(config.token_encoding_model)
+        self.tokenizer = get_tokenizer(config.token_encoding_model)
 
     def num_tokens(self, text: str) -> int:
         """
@@ -3,6 +3,9 @@ from typing import Callable, List
 
 from bs4 import BeautifulSoup
 
+# sentence boundary: a period followed by whitespace or newline
+_SENTENCE_END_RE = re.compile(r"\.\s|\.\n")
+
 
 def remove_extra_whitespace(s: str) -> str:
     lines = s.split("\n")
@@ -13,7 +16,7 @@ def remove_extra_whitespace(s: str) -> str:
 def custom_sent_tokenize(text: str) -> List[str]:
     sentences = [
         sentence.strip()
-        for sentence in re.split(r"\.\s|\.\n", text)
+        for sentence in _SENTENCE_END_RE.split(text)
         if sentence.strip()
     ]
     # append a period if the sentence does not end with one
@@ -1,16 +1,26 @@
 import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
 from typing import Dict, List, Literal
 
-import tiktoken
 from pydantic import BaseSettings
 
 from langroid.mytypes import Document
 from langroid.parsing.para_sentence_split import create_chunks, remove_extra_whitespace
+from langroid.parsing.utils import get_tokenizer
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.WARNING)
 
+# use threaded batch tokenization only for at least this many texts,
+# and with at most this many threads
+NUM_TOKENS_BATCH_MIN = 64
+NUM_TOKENS_MAX_THREADS = 8
+# chunk docs into tokens on threads only if they have at least this many chars
+# in total (same thread cap as above)
+SPLIT_TOKENS_PARALLEL_MIN_CHARS = 100_000
+
 
 class Splitter(str, Enum):
     TOKENS = "tokens"
@@ -47,12 +57,24 @@ class ParsingConfig(BaseSettings):
 class Parser:
     def __init__(self, config: ParsingConfig):
         self.config = config
-        self.tokenizer = tiktoken.encoding_for_model(config.token_encoding_model)
+        self.tokenizer = get_tokenizer(config.token_encoding_model)
 
     def num_tokens(self, text: str) -> int:
         tokens = self.tokenizer.encode(text)
         return len(tokens)
 
+    def num_tokens_batch(self, texts: List[str]) -> List[int]:
+        """
+        Token counts of several texts, same as calling `num_tokens` on each.
+        For large batches, tiktoken tokenizes them in parallel threads (it
+        releases the GIL); for small ones, the thread pool costs more than it saves.
+        """
+        num_threads = min(NUM_TOKENS_MAX_THREADS, os.cpu_count() or 1)
+        if num_threads <= 1 or len(texts) < NUM_TOKENS_BATCH_MIN:
+            return [self.num_tokens(text) for text in texts]
+        tokens_list = self.tokenizer.encode_batch(texts, num_threads=num_threads)
+        return [len(tokens) for tokens in tokens_list]
+
     def add_window_ids(self, chunks: List[Document]) -> None:
         """Chunks may belong to multiple docs, but for each doc,
         they appear consecutively. Add window_ids in metadata"""
@@ -76,12 +98,13 @@ class Parser:
         for orig, ids in orig_id_to_ids.items():
             # ids are consecutive chunks in a single doc
             n = len(ids)
-            window_ids = [ids[max(0, i - k) : min(n, i + k + 1)] for i in range(n)]
             for i, _ in enumerate(ids):
                 c = id2chunk[ids[i]]
                 if c.content.strip() == "":
                     continue
-                c.metadata.window_ids = window_ids[i]
+                # slice each window as needed, rather than building all n windows
+                # up front (including those of empty chunks, which are discarded)
+                c.metadata.window_ids = ids[max(0, i - k) : min(n, i + k + 1)]
                 c.metadata.id = ids[i]
                 c.metadata.is_chunk = True
 
@@ -110,10 +133,11 @@ class Parser:
         while True:
             un_splittables = 0
             split_chunks = []
-            for c in chunks:
+            chunk_lengths = self.num_tokens_batch([c.content for c in chunks])
+            for c, n_tokens in zip(chunks, chunk_lengths):
                 if c.content.strip() == "":
                     continue
-                if self.num_tokens(c.content) <= 1.3 * self.config.chunk_size:
+                if n_tokens <= 1.3 * self.config.chunk_size:
                     # small chunk: no need to split
                     split_chunks.append(c)
                     continue
@@ -122,7 +146,7 @@ class Parser:
                 split_chunks += splits
             if len(split_chunks) == len(chunks):
                 if un_splittables > 0:
-                    max_len = max([self.num_tokens(p.content) for p in chunks])
+                    max_len = max(chunk_lengths)
                     logger.warning(
                         f"""
                         Unable to split {un_splittables} chunks
@@ -154,9 +178,20 @@ class Parser:
         return final_chunks
 
     def split_chunk_tokens(self, docs: List[Document]) -> List[Document]:
+        contents = [d.content for d in docs]
+        num_threads = min(len(docs), NUM_TOKENS_MAX_THREADS, os.cpu_count() or 1)
+        if (
+            num_threads > 1
+            and sum(len(c) for c in contents) >= SPLIT_TOKENS_PARALLEL_MIN_CHARS
+        ):
+            # tiktoken releases the GIL while encoding, so docs can be
+            # tokenized concurrently on threads
+            with ThreadPoolExecutor(max_workers=num_threads) as executor:
+                doc_chunks = list(executor.map(self.chunk_tokens, contents))
+        else:
+            doc_chunks = [self.chunk_tokens(c) for c in contents]
         final_docs = []
-        for d in docs:
-            chunks = self.chunk_tokens(d.content)
+        for d, chunks in zip(docs, doc_chunks):
             chunk_docs = [
                 Document(
                     content=c, metadata=d.metadata.copy(update=dict(is_chunk=True))
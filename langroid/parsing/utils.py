@@ -1,11 +1,12 @@
 import difflib
 import random
 import re
-from functools import cache
+from functools import cache, lru_cache
 from itertools import islice
-from typing import Any, Iterable, List
+from typing import Any, Iterable, List, Optional
 
 import nltk
+import tiktoken
 from faker import Faker
 
 Faker.seed(23)
@@ -21,6 +22,12 @@ def download_nltk_resource(resource: str) -> None:
         nltk.download(resource, quiet=True)
 
 
+@lru_cache(maxsize=16)
+def get_tokenizer(model: str) -> tiktoken.Encoding:
+    """Tokenizer for `model`, built once per model name and shared by all callers"""
+    return tiktoken.encoding_for_model(model)
+
+
 def batched(iterable: Iterable[Any], n: int) -> Iterable[Any]:
     """Batch data into tuples of length n. The last batch may be shorter."""
     # batched('ABCDEFG', 3) --> ABC DEF G
@@ -47,8 +54,11 @@ def generate_random_sentences(k: int) -> str:
     return " ".join(random_sentences)
 
 
-def generate_random_text(num_sentences: int) -> str:
+def generate_random_text(num_sentences: int, seed: Optional[int] = None) -> str:
     fake = Faker()
+    if seed is not None:
+        # seed only this instance, leaving the global Faker random state alone
+        fake.seed_instance(seed)
     text = ""
     for _ in range(num_sentences):
         text += fake.sentence() + " "
@@ -86,10 +86,11 @@ def components(order: np.ndarray) -> List[List[int]]:
             i2g[i] = next_group
             next_group += 1
         else:
-            # If the node is connected to multiple groups, we merge them
+            # If the node is connected to multiple groups, we merge them,
+            # relabelling all members of those groups (not just i's neighbors)
             main_group = min(connected_groups)
-            for j in np.nonzero(order[i, :])[0]:
-                if i2g.get(j) in connected_groups:
+            for j, g in i2g.items():
+                if g in connected_groups:
                     i2g[j] = main_group
             i2g[i] = main_group
 
@@ -101,3 +102,73 @@ def components(order: np.ndarray) -> List[List[int]]:
         groups[group].append(index)
 
     return list(groups.values())
+
+
+class UnionFind:
+    """
+    Disjoint-set forest over nodes `0..n-1`, with union by size and path
+    compression. Each node also carries an integer offset relative to the root
+    of its set, so nodes in a set can be placed on a common number line, e.g.
+    the start positions of overlapping windows over a sequence.
+
+    Example:
+        uf = UnionFind(3)
+        uf.union(1, 0, 2)  # node 1 is 2 units after node 0
+        uf.groups()
+        # [[0, 1], [2]]
+        uf.offset(1) - uf.offset(0)
+        # 2
+    """
+
+    def __init__(self, n: int):
+        self.parent = list(range(n))
+        self.size = [1] * n
+        self._offset = [0] * n  # offset relative to parent
+
+    def find(self, i: int) -> int:
+        """Root of the set containing `i`."""
+        path = []
+        while self.parent[i] != i:
+            path.append(i)
+            i = self.parent[i]
+        root = i
+        # compress the path, nearest-to-root first, so each node's parent
+        # offset is already relative to the root when it is added in
+        for node in reversed(path):
+            parent = self.parent[node]
+            if parent != root:
+                self._offset[node] += self._offset[parent]
+            self.parent[node] = root
+        return root
+
+    def offset(self, i: int) -> int:
+        """Offset of `i` relative to the root of its set."""
+        self.find(i)
+        return self._offset[i]
+
+    def union(self, i: int, j: int, delta: int = 0) -> None:
+        """
+        Merge the sets containing `i` and `j`, recording that
+        `offset(i) - offset(j) == delta`. If `i` and `j` are already in the same
+        set, the existing offsets are kept.
+        """
+        root_i, root_j = self.find(i), self.find(j)
+        if root_i == root_j:
+            return
+        # offset of root_j relative to root_i
+        rel = self._offset[i] - delta - self._offset[j]
+        if self.size[root_i] < self.size[root_j]:
+            root_i, root_j, rel = root_j, root_i, -rel
+        self.parent[root_j] = root_i
+        self._offset[root_j] = rel
+        self.size[root_i] += self.size[root_j]
+
+    def groups(self) -> List[List[int]]:
+        """
+        The disjoint sets, each as a sorted list of nodes; sets are ordered by
+        their smallest node.
+        """
+        groups: Dict[int, List[int]] = {}
+        for i in range(len(self.parent)):
+            groups.setdefault(self.find(i), []).append(i)
+        return list(groups.values())
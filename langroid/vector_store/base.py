@@ -3,14 +3,13 @@ import logging
 from abc import ABC, abstractmethod
 from typing import Dict, List, Optional, Sequence, Tuple
 
-import numpy as np
 import pandas as pd
 from pydantic import BaseSettings
 
 from langroid.embedding_models.base import EmbeddingModel, EmbeddingModelsConfig
 from langroid.embedding_models.models import OpenAIEmbeddingsConfig
-from langroid.mytypes import Document
-from langroid.utils.algorithms.graph import components, topological_sort
+from langroid.mytypes import Document, Embeddings
+from langroid.utils.algorithms.graph import UnionFind
 from langroid.utils.configuration import settings
 from langroid.utils.output.printing import print_long_text
 from langroid.utils.pandas_utils import stringify
@@ -129,6 +128,30 @@ class VectorStore(ABC):
     def add_documents(self, documents: Sequence[Document]) -> None:
         pass
 
+    def add_embeddings(
+        self, documents: Sequence[Document], embeddings: Embeddings
+    ) -> None:
+        """
+        Add documents along with their precomputed embeddings, bypassing the
+        embedding model (e.g. when the same docs are added to several vector
+        stores, or their embeddings are already available).
+
+        Args:
+            documents (Sequence[Document]): Documents to add.
+            embeddings (Embeddings): Embedding of each document's content,
+                in the same order as `documents`.
+        """
+        raise NotImplementedError(
+            f"{self.__class__.__name__} does not support adding embeddings directly"
+        )
+
+    @staticmethod
+    def check_embeddings(documents: Sequence[Document], embeddings: Embeddings) -> None:
+        if len(documents) != len(embeddings):
+            raise ValueError(
+                f"Got {len(embeddings)} embeddings for {len(documents)} documents"
+            )
+
     def compute_from_docs(self, docs: List[Document], calc: str) -> str:
         """Compute a result on a set of documents,
         using a dataframe calc string like `df.groupby('state')['income'].mean()`.
@@ -191,6 +214,30 @@ class VectorStore(ABC):
         """
         pass
 
+    def similar_texts_with_scores_batch(
+        self,
+        texts: List[str],
+        k: int = 1,
+        where: Optional[str] = None,
+    ) -> List[List[Tuple[Document, float]]]:
+        """
+        Batched version of `similar_texts_with_scores`: find the k most similar
+        texts to each of the given texts. Vector stores that support it should
+        override this to embed all texts in one call and issue a single batched
+        search; this default simply searches for each text in turn.
+
+        Args:
+            texts (List[str]): The texts to find similar texts for.
+            k (int, optional): Number of similar texts to retrieve per text.
+                Defaults to 1.
+            where (Optional[str], optional): Where clause to filter the search.
+
+        Returns:
+            List[List[Tuple[Document,float]]]: For each text, a list of
+                (Document, score) tuples.
+        """
+        return [self.similar_texts_with_scores(text, k, where) for text in texts]
+
     def add_context_window(
         self, docs_scores: List[Tuple[Document, float]], neighbors: int = 0
     ) -> List[Tuple[Document, float]]:
@@ -268,8 +315,7 @@ class VectorStore(ABC):
         """
         Given a collection of windows, where each window is a sequence of ids,
         identify groups of overlapping windows, and for each overlapping group,
-        order the chunk-ids using topological sort so they appear in the original
-        order in the text.
+        order the chunk-ids so they appear in the original order in the text.
 
         Args:
             windows (List[int|str]): List of windows, where each window is a
@@ -279,47 +325,32 @@ class VectorStore(ABC):
             List[int|str]: List of windows, where each window is a sequence of ids,
                 and no two windows overlap.
         """
-        ids = set(id for w in windows for id in w)
-        # id -> {win -> # pos}
-        id2win2pos: Dict[str, Dict[int, int]] = {id: {} for id in ids}
-
+        # Within a doc, windows are runs of consecutive chunk-ids, so if windows
+        # i and j share an id, at positions p and q respectively, then
+        # start(i) - start(j) = q - p. Union overlapping windows, tracking each
+        # window's start relative to its group, to place all ids of a group
+        # on a common axis.
+        uf = UnionFind(len(windows))
+        first_seen: Dict[str, Tuple[int, int]] = {}  # id -> (window, position)
         for i, w in enumerate(windows):
-            for j, id in enumerate(w):
-                id2win2pos[id][i] = j
-
-        n = len(windows)
-        # relation between windows:
-        order = np.zeros((n, n), dtype=np.int8)
-        for i, w in enumerate(windows):
-            for j, x in enumerate(windows):
-                if i == j:
-                    continue
-                if len(set(w).intersection(x)) == 0:
-                    continue
-                id = list(set(w).intersection(x))[0]  # any common id
-                if id2win2pos[id][i] > id2win2pos[id][j]:
-                    order[i, j] = -1  # win i is before win j
+            for p, id in enumerate(w):
+                if id in first_seen:
+                    j, q = first_seen[id]
+                    uf.union(i, j, q - p)
                 else:
-                    order[i, j] = 1  # win i is after win j
-
-        # find groups of windows that overlap, like connected components in a graph
-        groups = components(np.abs(order))
+                    first_seen[id] = (i, p)
 
-        # order the chunk-ids in each group using topological sort
         new_windows = []
-        for g in groups:
-            # find total ordering among windows in group based on order matrix
-            # (this is a topological sort)
-            _g = np.array(g)
-            order_matrix = order[_g][:, _g]
-            ordered_window_indices = topological_sort(order_matrix)
-            ordered_window_ids = [windows[i] for i in _g[ordered_window_indices]]
-            flattened = [id for w in ordered_window_ids for id in w]
-            flattened_deduped = list(dict.fromkeys(flattened))
+        for g in uf.groups():
+            id2pos: Dict[str, int] = {}
+            for i in g:
+                start = uf.offset(i)
+                for p, id in enumerate(windows[i]):
+                    id2pos[id] = start + p
             # Note we are not going to split these, and instead we'll return
             # larger windows from concatenating the connected groups.
             # This ensures context is retained for LLM q/a
-            new_windows += [flattened_deduped]
+            new_windows += [sorted(id2pos, key=id2pos.__getitem__)]
 
         return new_windows
 
@@ -1,5 +1,6 @@
 import json
 import logging
+from functools import lru_cache
 from typing import Any, Dict, List, Optional, Sequence, Tuple
 
 import chromadb
@@ -9,7 +10,7 @@ from langroid.embedding_models.base import (
     EmbeddingModelsConfig,
 )
 from langroid.embedding_models.models import OpenAIEmbeddingsConfig
-from langroid.mytypes import DocMetaData, Document
+from langroid.mytypes import DocMetaData, Document, Embeddings
 from langroid.utils.configuration import settings
 from langroid.utils.output.printing import print_long_text
 from langroid.vector_store.base import VectorStore, VectorStoreConfig
@@ -17,12 +18,34 @@ from langroid.vector_store.base import VectorStore, VectorStoreConfig
 logger = logging.getLogger(__name__)
 
 
+def new_chroma_client(storage_path: str) -> Any:
+    return chromadb.Client(
+        chromadb.config.Settings(
+            # chroma_db_impl="duckdb+parquet",
+            persist_directory=storage_path,
+        )
+    )
+
+
+@lru_cache(maxsize=None)
+def chroma_client(storage_path: str) -> Any:
+    """
+    Process-wide chroma client for the given storage path, shared by all ChromaDB
+    instances using that path with `shared_client=True`. Note that with chroma's
+    default in-memory backend, these instances then also share collections.
+    """
+    return new_chroma_client(storage_path)
+
+
 class ChromaDBConfig(VectorStoreConfig):
     collection_name: str = "temp"
     storage_path: str = ".chroma/data"
     embedding: EmbeddingModelsConfig = OpenAIEmbeddingsConfig()
     host: str = "127.0.0.1"
     port: int = 6333
+    # reuse one process-wide client per storage_path, rather than a new one
+    # per instance (instances then share collections, see `chroma_client`)
+    shared_client: bool = False
 
 
 class ChromaDB(VectorStore):
@@ -31,12 +54,10 @@ class ChromaDB(VectorStore):
         self.config = config
         emb_model = EmbeddingModel.create(config.embedding)
         self.embedding_fn = emb_model.embedding_fn()
-        self.client = chromadb.Client(
-            chromadb.config.Settings(
-                # chroma_db_impl="duckdb+parquet",
-                persist_directory=config.storage_path,
-            )
-        )
+        if self.config.shared_client:
+            self.client = chroma_client(config.storage_path)
+        else:
+            self.client = new_chroma_client(config.storage_path)
         if self.config.collection_name is not None:
             self.create_collection(
                 self.config.collection_name,
@@ -110,9 +131,24 @@ class ChromaDB(VectorStore):
         )
 
     def add_documents(self, documents: Sequence[Document]) -> None:
-        super().maybe_add_ids(documents)
         if documents is None:
             return
+        self._add(documents)
+
+    def add_embeddings(
+        self, documents: Sequence[Document], embeddings: Embeddings
+    ) -> None:
+        self.check_embeddings(documents, embeddings)
+        self._add(documents, embeddings)
+
+    def _add(
+        self, documents: Sequence[Document], embeddings: Optional[Embeddings] = None
+    ) -> None:
+        """
+        Add documents to the collection; if `embeddings` is None, chroma embeds
+        the contents using the collection's embedding function.
+        """
+        super().maybe_add_ids(documents)
         contents: List[str] = [document.content for document in documents]
         # convert metadatas to dicts so chroma can handle them
         metadata_dicts: List[dict[str, Any]] = [
@@ -124,7 +160,7 @@ class ChromaDB(VectorStore):
 
         ids = [str(d.id()) for d in documents]
         self.collection.add(
-            # embedding_models=embedding_models,
+            embeddings=embeddings,
             documents=contents,
             metadatas=metadata_dicts,
             ids=ids,
@@ -152,18 +188,34 @@ class ChromaDB(VectorStore):
     def similar_texts_with_scores(
         self, text: str, k: int = 1, where: Optional[str] = None
     ) -> List[Tuple[Document, float]]:
+        return self.similar_texts_with_scores_batch([text], k=k, where=where)[0]
+
+    def similar_texts_with_scores_batch(
+        self, texts: List[str], k: int = 1, where: Optional[str] = None
+    ) -> List[List[Tuple[Document, float]]]:
+        if len(texts) == 0:
+            return []
         n = self.collection.count()
         filter = json.loads(where) if where else None
+        # chroma embeds all query texts in one call and searches them together
         results = self.collection.query(
-            query_texts=[text],
+            query_texts=texts,
             n_results=min(n, k),
             where=filter,
             include=["documents", "distances", "metadatas"],
         )
-        docs = self._docs_from_results(results)
-        # chroma distances are 1 - cosine.
-        scores = [1 - s for s in results["distances"][0]]
-        return list(zip(docs, scores))
+        doc_scores_list = []
+        for i in range(len(texts)):
+            docs = self._docs_from_results(
+                dict(
+                    documents=[results["documents"][i]],
+                    metadatas=[results["metadatas"][i]],
+                )
+            )
+            # chroma distances are 1 - cosine.
+            scores = [1 - s for s in results["distances"][i]]
+            doc_scores_list.append(list(zip(docs, scores)))
+        return doc_scores_list
 
     def _docs_from_results(self, results: Dict[str, Any]) -> List[Document]:
         """
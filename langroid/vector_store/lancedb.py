@@ -1,4 +1,5 @@
 import logging
+from functools import lru_cache
 from typing import Any, Dict, Generator, List, Optional, Sequence, Tuple, Type
 
 import lancedb
@@ -13,7 +14,7 @@ from langroid.embedding_models.base import (
     EmbeddingModelsConfig,
 )
 from langroid.embedding_models.models import OpenAIEmbeddingsConfig
-from langroid.mytypes import Document, EmbeddingFunction
+from langroid.mytypes import Document, Embedding, EmbeddingFunction, Embeddings
 from langroid.utils.configuration import settings
 from langroid.utils.pydantic_utils import (
     dataframe_to_document_model,
@@ -27,6 +28,15 @@ from langroid.vector_store.base import VectorStore, VectorStoreConfig
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=None)
+def lance_connection(storage_path: str) -> Any:
+    """
+    Process-wide LanceDB connection for the given storage path, shared by all
+    LanceDB instances using that path.
+    """
+    return lancedb.connect(uri=storage_path)
+
+
 class LanceDBConfig(VectorStoreConfig):
     cloud: bool = False
     collection_name: str | None = "temp"
@@ -35,6 +45,10 @@ class LanceDBConfig(VectorStoreConfig):
     distance: str = "cosine"
     document_class: Type[Document] = Document
     flatten: bool = False  # flatten Document class into LanceSchema ?
+    # build an IVF_PQ ANN index after adding docs, if the table has none yet?
+    # Only worthwhile for large tables (~100K+ vectors); otherwise a flat
+    # (brute-force) search is faster. See `LanceDB.build_index`.
+    create_index: bool = False
 
 
 class LanceDB(VectorStore):
@@ -58,9 +72,7 @@ class LanceDB(VectorStore):
             config.cloud = False
         else:
             try:
-                self.client = lancedb.connect(
-                    uri=config.storage_path,
-                )
+                self.client = lance_connection(config.storage_path)
             except Exception as e:
                 new_storage_path = config.storage_path + ".new"
                 logger.warning(
@@ -70,9 +82,7 @@ class LanceDB(VectorStore):
                     Switching to {new_storage_path}
                     """
                 )
-                self.client = lancedb.connect(
-                    uri=new_storage_path,
-                )
+                self.client = lance_connection(new_storage_path)
 
         # Note: Only create collection if a non-null collection name is provided.
         # This is useful to delay creation of vecdb until we have a suitable
@@ -217,11 +227,19 @@ class LanceDB(VectorStore):
             logger.setLevel(level)
 
     def add_documents(self, documents: Sequence[Document]) -> None:
+        if len(documents) == 0:
+            return
+        embedding_vecs = self.embedding_fn([doc.content for doc in documents])
+        self.add_embeddings(documents, embedding_vecs)
+
+    def add_embeddings(
+        self, documents: Sequence[Document], embeddings: Embeddings
+    ) -> None:
+        self.check_embeddings(documents, embeddings)
         super().maybe_add_ids(documents)
         colls = self.list_collections(empty=True)
         if len(documents) == 0:
             return
-        embedding_vecs = self.embedding_fn([doc.content for doc in documents])
         coll_name = self.config.collection_name
         if coll_name is None:
             raise ValueError("No collection name set, cannot ingest docs")
@@ -246,7 +264,7 @@ class LanceDB(VectorStore):
                 batch = [
                     self.unflattened_schema(
                         id=ids[i],
-                        vector=embedding_vecs[i],
+                        vector=embeddings[i],
                         **doc.dict(),
                     )
                     for i, doc in enumerate(documents[i : i + b])
@@ -269,6 +287,38 @@ class LanceDB(VectorStore):
                 {self.config.storage_path} and try again.
                 """
             )
+        if self.config.create_index:
+            self.build_index()
+
+    def build_index(self, replace: bool = False) -> None:
+        """
+        Build the IVF_PQ ANN index on the vector column of the current collection.
+        Training the index is expensive, so by default this does nothing if the
+        table already has one: rows added later are still found (lance scans
+        unindexed rows), but after substantial ingestion, rebuild the index
+        with `replace=True`.
+
+        Args:
+            replace (bool): Whether to retrain and replace an existing index.
+        """
+        if self.config.collection_name is None:
+            raise ValueError("No collection name set, cannot build index")
+        tbl = self.client.open_table(self.config.collection_name)
+        if not replace and len(tbl.to_lance().list_indices()) > 0:
+            return
+        try:
+            tbl.create_index(metric=self.config.distance, replace=True)
+        except OSError as e:
+            # too few rows to train the index's centroids: flat search it is;
+            # any other error (e.g. a misconfigured index) is a real problem
+            if "can not train" not in str(e):
+                raise
+            logger.warning(
+                f"""
+                Too few rows to build an index on LanceDB table {tbl.name}: {e}
+                Falling back to flat (brute-force) search.
+                """
+            )
 
     def add_dataframe(
         self,
@@ -331,6 +381,8 @@ class LanceDB(VectorStore):
             # collection exists and is not empty, so append to it
             tbl = self.client.open_table(self.config.collection_name)
             tbl.add(df)
+        if self.config.create_index:
+            self.build_index()
 
     def delete_collection(self, collection_name: str) -> None:
         self.client.drop_table(collection_name)
@@ -385,13 +437,13 @@ class LanceDB(VectorStore):
         ]
         return docs
 
-    def similar_texts_with_scores(
+    def _similar_texts_with_scores_from_embedding(
         self,
         text: str,
+        embedding: Embedding,
         k: int = 1,
         where: Optional[str] = None,
     ) -> List[Tuple[Document, float]]:
-        embedding = self.embedding_fn([text])[0]
         tbl = self.client.open_table(self.config.collection_name)
         result = (
             tbl.search(embedding).metric(self.config.distance).where(where).limit(k)
@@ -412,3 +464,27 @@ class LanceDB(VectorStore):
         doc_score_pairs = list(zip(docs, scores))
         self.show_if_debug(doc_score_pairs)
         return doc_score_pairs
+
+    def similar_texts_with_scores(
+        self,
+        text: str,
+        k: int = 1,
+        where: Optional[str] = None,
+    ) -> List[Tuple[Document, float]]:
+        embedding = self.embedding_fn([text])[0]
+        return self._similar_texts_with_scores_from_embedding(text, embedding, k, where)
+
+    def similar_texts_with_scores_batch(
+        self,
+        texts: List[str],
+        k: int = 1,
+        where: Optional[str] = None,
+    ) -> List[List[Tuple[Document, float]]]:
+        if len(texts) == 0:
+            return []
+        # LanceDB has no batched search, but we can still embed all texts at once
+        embeddings = self.embedding_fn(texts)
+        return [
+            self._similar_texts_with_scores_from_embedding(text, embedding, k, where)
+            for text, embedding in zip(texts, embeddings)
+        ]
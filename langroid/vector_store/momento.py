@@ -25,7 +25,7 @@ from langroid.embedding_models.base import (
     EmbeddingModelsConfig,
 )
 from langroid.embedding_models.models import OpenAIEmbeddingsConfig
-from langroid.mytypes import Document, EmbeddingFunction
+from langroid.mytypes import Document, EmbeddingFunction, Embeddings
 from langroid.utils.configuration import settings
 from langroid.utils.pydantic_utils import (
     flatten_pydantic_instance,
@@ -151,10 +151,18 @@ class MomentoVI(VectorStore):
             logger.setLevel(level)
 
     def add_documents(self, documents: Sequence[Document]) -> None:
-        super().maybe_add_ids(documents)
         if len(documents) == 0:
             return
         embedding_vecs = self.embedding_fn([doc.content for doc in documents])
+        self.add_embeddings(documents, embedding_vecs)
+
+    def add_embeddings(
+        self, documents: Sequence[Document], embeddings: Embeddings
+    ) -> None:
+        self.check_embeddings(documents, embeddings)
+        super().maybe_add_ids(documents)
+        if len(documents) == 0:
+            return
         if self.config.collection_name is None:
             raise ValueError("No collection name set, cannot ingest docs")
 
@@ -163,7 +171,7 @@ class MomentoVI(VectorStore):
         items = [
             Item(
                 id=str(d.id()),
-                vector=embedding_vecs[i],
+                vector=embeddings[i],
                 metadata=flatten_pydantic_instance(d, force_str=True),
                 # force all values to str since Momento requires it
             )
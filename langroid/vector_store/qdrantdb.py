@@ -13,7 +13,9 @@ from qdrant_client.http.models import (
     CollectionStatus,
     Distance,
     Filter,
+    HnswConfigDiff,
     SearchParams,
+    SearchRequest,
     VectorParams,
 )
 
@@ -22,7 +24,7 @@ from langroid.embedding_models.base import (
     EmbeddingModelsConfig,
 )
 from langroid.embedding_models.models import OpenAIEmbeddingsConfig
-from langroid.mytypes import Document, EmbeddingFunction
+from langroid.mytypes import Document, EmbeddingFunction, Embeddings
 from langroid.utils.configuration import settings
 from langroid.vector_store.base import VectorStore, VectorStoreConfig
 
@@ -62,12 +64,21 @@ class QdrantDBConfig(VectorStoreConfig):
     storage_path: str = ".qdrant/data"
     embedding: EmbeddingModelsConfig = OpenAIEmbeddingsConfig()
     distance: str = Distance.COSINE
+    # HNSW graph degree; set to 0 to skip building the HNSW index
+    # (e.g. for bulk ingestion, or small collections where a full scan is fast)
+    hnsw_m: int = 16
+    # wait for each upsert batch to be applied (and persisted) before returning?
+    # Set False for faster bulk ingestion when the points need not be searchable
+    # immediately (the local client applies upserts synchronously regardless).
+    wait_on_upsert: bool = True
+    # use gRPC instead of HTTP/REST (cloud only): lower per-request overhead
+    prefer_grpc: bool = False
 
 
 class QdrantDB(VectorStore):
     def __init__(self, config: QdrantDBConfig = QdrantDBConfig()):
         super().__init__(config)
-        self.config = config
+        self.config: QdrantDBConfig = config
         emb_model = EmbeddingModel.create(config.embedding)
         self.embedding_fn: EmbeddingFunction = emb_model.embedding_fn()
         self.embedding_dim = emb_model.embedding_dims
@@ -90,6 +101,7 @@ class QdrantDB(VectorStore):
                 url=url,
                 api_key=key,
                 timeout=config.timeout,
+                prefer_grpc=config.prefer_grpc,
             )
         else:
             try:
@@ -211,6 +223,7 @@ class QdrantDB(VectorStore):
                 size=self.embedding_dim,
                 distance=Distance.COSINE,
             ),
+            hnsw_config=HnswConfigDiff(m=self.config.hnsw_m),
         )
         collection_info = self.client.get_collection(collection_name=collection_name)
         assert collection_info.status == CollectionStatus.GREEN
@@ -222,6 +235,15 @@ class QdrantDB(VectorStore):
             logger.setLevel(level)
 
     def add_documents(self, documents: Sequence[Document]) -> None:
+        if len(documents) == 0:
+            return
+        embedding_vecs = self.embedding_fn([doc.content for doc in documents])
+        self.add_embeddings(documents, embedding_vecs)
+
+    def add_embeddings(
+        self, documents: Sequence[Document], embeddings: Embeddings
+    ) -> None:
+        self.check_embeddings(documents, embeddings)
         # Add id to metadata if not already present
         super().maybe_add_ids(documents)
         # Fix the ids due to qdrant finickiness
@@ -230,7 +252,6 @@ class QdrantDB(VectorStore):
         colls = self.list_collections(empty=True)
         if len(documents) == 0:
             return
-        embedding_vecs = self.embedding_fn([doc.content for doc in documents])
         if self.config.collection_name is None:
             raise ValueError("No collection name set, cannot ingest docs")
         if self.config.collection_name not in colls:
@@ -242,10 +263,12 @@ class QdrantDB(VectorStore):
         for i in range(0, len(ids), b):
             self.client.upsert(
                 collection_name=self.config.collection_name,
+                wait=self.config.wait_on_upsert,
                 points=Batch(
                     ids=ids[i : i + b],
-                    vectors=embedding_vecs[i : i + b],
-                    payloads=documents[i : i + b],
+                    vectors=embeddings[i : i + b],
+                    # plain dicts, so they serialize over both REST and gRPC
+                    payloads=[d.dict() for d in documents[i : i + b]],
                 ),
             )
 
@@ -318,6 +341,31 @@ class QdrantDB(VectorStore):
         docs = [Document(**payload) for payload in ordered_payloads]  # type: ignore
         return docs
 
+    def _make_filter(self, where: Optional[str]) -> Filter:
+        # TODO filter may not work yet
+        if where is None or where == "":
+            return Filter()
+        return Filter.parse_obj(json.loads(where))
+
+    def _search_result_to_doc_scores(
+        self, text: str, search_result: List[ScoredPoint]
+    ) -> List[Tuple[Document, float]]:
+        scores = [match.score for match in search_result if match is not None]
+        docs = [
+            Document(**(match.payload))  # type: ignore
+            for match in search_result
+            if match is not None
+        ]
+        if len(docs) == 0:
+            logger.warning(f"No matches found for {text}")
+            return []
+        doc_score_pairs = list(zip(docs, scores))
+        max_score = max(ds[1] for ds in doc_score_pairs)
+        if settings.debug:
+            logger.info(f"Found {len(doc_score_pairs)} matches, max score: {max_score}")
+        self.show_if_debug(doc_score_pairs)
+        return doc_score_pairs
+
     def similar_texts_with_scores(
         self,
         text: str,
@@ -326,11 +374,7 @@ class QdrantDB(VectorStore):
         neighbors: int = 0,
     ) -> List[Tuple[Document, float]]:
         embedding = self.embedding_fn([text])[0]
-        # TODO filter may not work yet
-        if where is None or where == "":
-            filter = Filter()
-        else:
-            filter = Filter.parse_obj(json.loads(where))
+        filter = self._make_filter(where)
         if self.config.collection_name is None:
             raise ValueError("No collection name set, cannot search")
         search_result: List[ScoredPoint] = self.client.search(
@@ -343,18 +387,38 @@ class QdrantDB(VectorStore):
                 exact=False,  # use Apx NN, not exact NN
             ),
         )
-        scores = [match.score for match in search_result if match is not None]
-        docs = [
-            Document(**(match.payload))  # type: ignore
-            for match in search_result
-            if match is not None
-        ]
-        if len(docs) == 0:
-            logger.warning(f"No matches found for {text}")
+        return self._search_result_to_doc_scores(text, search_result)
+
+    def similar_texts_with_scores_batch(
+        self,
+        texts: List[str],
+        k: int = 1,
+        where: Optional[str] = None,
+    ) -> List[List[Tuple[Document, float]]]:
+        if len(texts) == 0:
             return []
-        doc_score_pairs = list(zip(docs, scores))
-        max_score = max(ds[1] for ds in doc_score_pairs)
-        if settings.debug:
-            logger.info(f"Found {len(doc_score_pairs)} matches, max score: {max_score}")
-        self.show_if_debug(doc_score_pairs)
-        return doc_score_pairs
+        # embed all texts in one call, then run all searches in one request
+        embeddings = self.embedding_fn(texts)
+        filter = self._make_filter(where)
+        if self.config.collection_name is None:
+            raise ValueError("No collection name set, cannot search")
+        search_results: List[List[ScoredPoint]] = self.client.search_batch(
+            collection_name=self.config.collection_name,
+            requests=[
+                SearchRequest(
+                    vector=embedding,
+                    filter=filter,
+                    limit=k,
+                    params=SearchParams(
+                        hnsw_ef=128,
+                        exact=False,  # use Apx NN, not exact NN
+                    ),
+                    with_payload=True,
+                )
+                for embedding in embeddings
+            ],
+        )
+        return [
+            self._search_result_to_doc_scores(text, search_result)
+            for text, search_result in zip(texts, search_results)
+        ]
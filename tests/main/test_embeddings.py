@@ -1,7 +1,13 @@
+from collections import OrderedDict
+from types import SimpleNamespace
+from typing import Callable, List
+
+import pytest
 from dotenv import find_dotenv, load_dotenv
 
+import langroid.embedding_models.models as models
 from langroid.embedding_models.base import EmbeddingModel
-from langroid.embedding_models.models import OpenAIEmbeddingsConfig
+from langroid.embedding_models.models import OpenAIEmbeddings, OpenAIEmbeddingsConfig
 
 
 def test_embeddings():
@@ -17,3 +23,118 @@ def test_embeddings():
     openai_fn = openai_model.embedding_fn()
 
     assert len(openai_fn(["hello"])[0]) == openai_cfg.dims
+
+
+@pytest.fixture
+def api_calls(monkeypatch) -> List[List[List[int]]]:
+    """
+    Offline setup for OpenAIEmbeddings tests: start from an empty in-memory
+    cache, with the on-disk cache disabled. Models made with `mock_model`
+    record the (tokenized) inputs of each embeddings API call here.
+    """
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    # set (rather than unset), so a .env file can't enable it
+    monkeypatch.setenv("LANGROID_EMBED_CACHE", "0")
+    monkeypatch.setattr(models, "_embedding_cache", OrderedDict())
+    return []
+
+
+def mock_model(
+    cfg: OpenAIEmbeddingsConfig, api_calls: List[List[List[int]]]
+) -> Callable[[List[str]], List[List[float]]]:
+    model = OpenAIEmbeddings(cfg)
+
+    def create(input: List[List[int]], model: str) -> SimpleNamespace:
+        api_calls.append(input)
+        return SimpleNamespace(
+            data=[
+                SimpleNamespace(embedding=[float(len(t)), float(sum(t))]) for t in input
+            ]
+        )
+
+    model.client = SimpleNamespace(embeddings=SimpleNamespace(create=create))
+    return model.embedding_fn()
+
+
+def test_embedding_cache_hits(api_calls):
+    embed = mock_model(OpenAIEmbeddingsConfig(cache_size=10), api_calls)
+    first = embed(["hello", "world"])
+    assert len(api_calls) == 1
+
+    # cache is shared across instances
+    embed = mock_model(OpenAIEmbeddingsConfig(cache_size=10), api_calls)
+    assert embed(["world", "hello"]) == first[::-1]
+    assert len(api_calls) == 1
+
+    # callers get their own copies, so mutating a result can't corrupt the cache
+    embed(["hello"])[0].append(0.0)
+    assert embed(["hello"]) == first[:1]
+    assert len(api_calls) == 1
+
+
+@pytest.mark.parametrize("cache_size", [0, 10])
+def test_embedding_cache_dedup(api_calls, cache_size: int):
+    embed = mock_model(OpenAIEmbeddingsConfig(cache_size=cache_size), api_calls)
+    embeds = embed(["hello", "world", "hello"])
+    # repeated texts are only sent once
+    assert len(api_calls) == 1 and len(api_calls[0]) == 2
+    assert embeds[0] == embeds[2] != embeds[1]
+    # ... but each position gets its own list
+    assert embeds[0] is not embeds[2]
+    embeds[0].append(0.0)
+    assert embeds[2] != embeds[0]
+
+
+def test_embedding_cache_eviction(api_calls):
+    embed = mock_model(OpenAIEmbeddingsConfig(cache_size=2), api_calls)
+    embed(["hello"])
+    embed(["world"])
+    embed(["hello"])  # hit: "hello" is now the most recently used
+    assert len(api_calls) == 2
+    embed(["cats"])  # evicts "world"
+    assert len(api_calls) == 3
+    embed(["hello", "cats"])
+    assert len(api_calls) == 3
+    embed(["world"])
+    assert len(api_calls) == 4
+    assert len(models._embedding_cache) == 2
+
+
+def test_embedding_cache_disabled(api_calls):
+    embed = mock_model(OpenAIEmbeddingsConfig(cache_size=0), api_calls)
+    first = embed(["hello", "hello"])
+    assert len(api_calls) == 1 and len(api_calls[0]) == 1
+    assert embed(["hello"]) == first[:1]
+    assert len(api_calls) == 2
+    assert len(models._embedding_cache) == 0
+
+
+def test_embedding_disk_cache(api_calls, monkeypatch, tmp_path):
+    db_path = tmp_path / "embeddings.db"
+    monkeypatch.setenv("LANGROID_EMBED_CACHE", "1")
+    monkeypatch.setenv("LANGROID_EMBED_CACHE_PATH", str(db_path))
+    first = mock_model(OpenAIEmbeddingsConfig(), api_calls)(["hello", "world"])
+    assert len(api_calls) == 1
+    assert db_path.exists()
+
+    # a fresh instance, with an empty in-memory cache, reads from disk
+    assert len(models._embedding_cache) == 0
+    embed = mock_model(OpenAIEmbeddingsConfig(), api_calls)
+    assert embed(["world", "hello"]) == first[::-1]
+    assert len(api_calls) == 1
+
+
+@pytest.mark.parametrize("unset", [False, True])
+def test_embedding_disk_cache_disabled(api_calls, monkeypatch, tmp_path, unset: bool):
+    db_path = tmp_path / "embeddings.db"
+    monkeypatch.setenv("LANGROID_EMBED_CACHE_PATH", str(db_path))
+    if unset:
+        # `api_calls` sets LANGROID_EMBED_CACHE=0; also check the unset case,
+        # without loading a .env file that might set it
+        monkeypatch.delenv("LANGROID_EMBED_CACHE")
+        monkeypatch.setattr(models, "load_dotenv", lambda *args, **kwargs: None)
+    embed = mock_model(OpenAIEmbeddingsConfig(), api_calls)
+    embed(["hello"])
+    embed(["hello"])
+    assert len(api_calls) == 2
+    assert not db_path.exists()
@@ -0,0 +1,99 @@
+import random
+
+import numpy as np
+
+from langroid.utils.algorithms.graph import UnionFind, components, topological_sort
+
+
+def test_components():
+    order = np.array(
+        [
+            [1, 1, 0, 0],
+            [1, 1, 1, 0],
+            [0, 1, 1, 0],
+            [0, 0, 0, 1],
+        ]
+    )
+    assert components(order) == [[0, 1, 2], [3]]
+
+    # node 3 merges groups {0} and {1, 2}: node 2, which is not a neighbor of
+    # node 3, must be relabelled too
+    edges = [(0, 3), (1, 2), (1, 3)]
+    order = np.zeros((4, 4), dtype=int)
+    for i, j in edges:
+        order[i, j] = order[j, i] = 1
+    assert components(order) == [[0, 1, 2, 3]]
+
+
+def test_topological_sort():
+    # order[i, j] = -1: i comes before j; 1: i comes after j
+    order = np.array(
+        [
+            [0, 1, 0],
+            [-1, 0, -1],
+            [0, 1, 0],
+        ]
+    )
+    result = topological_sort(order)
+    assert result[0] == 1 and sorted(result) == [0, 1, 2]
+
+
+def test_union_find_groups():
+    uf = UnionFind(6)
+    assert uf.groups() == [[0], [1], [2], [3], [4], [5]]
+    uf.union(4, 1)
+    uf.union(5, 3)
+    uf.union(3, 1)
+    assert uf.groups() == [[0], [1, 3, 4, 5], [2]]
+    assert uf.find(5) == uf.find(4) != uf.find(0)
+
+
+def test_union_find_offsets():
+    uf = UnionFind(4)
+    uf.union(1, 0, 2)  # offset(1) - offset(0) == 2; equal sizes: root 1
+    assert uf.find(0) == 1
+    assert uf.offset(1) - uf.offset(0) == 2
+    # union within a set keeps existing offsets
+    uf.union(1, 0, 7)
+    assert uf.offset(1) - uf.offset(0) == 2
+
+    # the smaller set {2} is attached under the root of the larger set, with
+    # the roles of i and j swapped
+    uf.union(2, 0, 5)
+    assert uf.parent[2] == uf.find(0) == 1
+    assert uf.offset(2) - uf.offset(0) == 5
+    assert uf.offset(2) - uf.offset(1) == 3
+
+
+def test_union_find_path_compression():
+    uf = UnionFind(4)
+    uf.union(0, 1, -1)  # {0, 1}, root 0
+    uf.union(2, 3, -1)  # {2, 3}, root 2
+    uf.union(1, 3, -2)  # equal sizes: root 2 goes under root 0, so 3 is 2 deep
+    assert uf.parent[3] == 2
+    # finding 3 compresses its path, and its offset becomes relative to root 0
+    assert uf.find(3) == 0
+    assert uf.parent[3] == 0
+    assert [uf.offset(i) for i in range(4)] == [0, 1, 2, 3]
+
+
+def test_union_find_random():
+    random.seed(0)
+    for _ in range(200):
+        n = random.randint(1, 30)
+        pos = [random.randint(-50, 50) for _ in range(n)]
+        uf = UnionFind(n)
+        edges = [(random.randrange(n), random.randrange(n)) for _ in range(n)]
+        for i, j in edges:
+            uf.union(i, j, pos[i] - pos[j])
+        # brute-force connected components
+        comp = list(range(n))
+        for _ in range(n):
+            for i, j in edges:
+                comp[i] = comp[j] = min(comp[i], comp[j])
+        groups = uf.groups()
+        assert sorted(map(sorted, groups)) == groups
+        for g in groups:
+            assert len({comp[i] for i in g}) == 1
+            assert all(uf.offset(i) - pos[i] == uf.offset(g[0]) - pos[g[0]] for i in g)
+        assert len(groups) == len(set(comp))
@@ -1,5 +1,10 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
 import pytest
 
+import langroid.parsing.parser as parser_module
 from langroid.mytypes import Document
 from langroid.parsing.parser import Parser, ParsingConfig, Splitter
 from langroid.parsing.utils import generate_random_text
@@ -7,6 +12,12 @@ from langroid.parsing.utils import generate_random_text
 CHUNK_SIZE = 100
 
 
+@lru_cache(maxsize=None)
+def corpus(seed: int, num_sentences: int) -> str:
+    """Deterministic random text, generated once per (seed, num_sentences)."""
+    return generate_random_text(num_sentences, seed=seed)
+
+
 @pytest.mark.parametrize(
     "splitter, chunk_size, max_chunks, min_chunk_chars, discard_chunk_chars",
     [
@@ -34,26 +45,66 @@ def test_parser(
     )
 
     parser = Parser(cfg)
-    docs = [
-        Document(content=generate_random_text(500), metadata={"id": i})
-        for i in range(5)
-    ]
+    docs = [Document(content=corpus(i, 500), metadata={"id": i}) for i in range(5)]
 
     split_docs = parser.split(docs)
 
-    assert all(parser.num_tokens(d.content) <= chunk_size + 5 for d in split_docs)
+    split_lengths = parser.num_tokens_batch([d.content for d in split_docs])
+    assert all(n <= chunk_size + 5 for n in split_lengths)
     assert len(split_docs) <= max_chunks * len(docs)
     assert all(len(d.content) >= discard_chunk_chars for d in split_docs)
     assert all(d.metadata.is_chunk for d in split_docs)
 
     # test neighbor chunks
-    doc = Document(content=generate_random_text(500), metadata={"id": 0})
+    doc = Document(content=corpus(5, 500), metadata={"id": 0})
     chunks = parser.split([doc])
     n = len(chunks)
     if n > 2 * cfg.n_neighbor_ids + 1:
         assert len(chunks[n // 2].metadata.window_ids) == 2 * cfg.n_neighbor_ids + 1
 
 
+@pytest.mark.parametrize("batched", [False, True])
+def test_num_tokens_batch(monkeypatch, batched: bool):
+    if batched:
+        # force the threaded path, even for a few texts on a single core
+        monkeypatch.setattr(parser_module, "NUM_TOKENS_BATCH_MIN", 1)
+        monkeypatch.setattr(os, "cpu_count", lambda: 4)
+    parser = Parser(ParsingConfig())
+    texts = [corpus(i, 20) for i in range(3)] + [""]
+    assert parser.num_tokens_batch(texts) == [parser.num_tokens(t) for t in texts]
+    # special tokens are handled just as in `num_tokens`
+    with pytest.raises(ValueError):
+        parser.num_tokens("end <|endoftext|>")
+    with pytest.raises(ValueError):
+        parser.num_tokens_batch(texts + ["end <|endoftext|>"])
+
+
+def test_split_chunk_tokens_threads(monkeypatch):
+    cfg = ParsingConfig(
+        splitter=Splitter.TOKENS,
+        chunk_size=20,
+        min_chunk_chars=10,
+        discard_chunk_chars=2,
+    )
+
+    def split():
+        docs = [Document(content=corpus(i, 50), metadata={"id": i}) for i in range(4)]
+        return [(d.content, d.metadata.window_ids) for d in Parser(cfg).split(docs)]
+
+    serial = split()
+    # force the threaded path: it must give the same chunks, in the same order
+    pools = []
+    monkeypatch.setattr(parser_module, "SPLIT_TOKENS_PARALLEL_MIN_CHARS", 0)
+    monkeypatch.setattr(os, "cpu_count", lambda: 4)
+    monkeypatch.setattr(
+        parser_module,
+        "ThreadPoolExecutor",
+        lambda **kw: pools.append(kw) or ThreadPoolExecutor(**kw),
+    )
+    assert split() == serial
+    assert pools == [{"max_workers": 4}]
+
+
 def length_fn(text):
     return len(text.split())  # num chars
 
@@ -79,7 +130,7 @@ def test_text_token_chunking(
 
     parser = Parser(cfg)
 
-    text = generate_random_text(60)
+    text = corpus(0, 60)
     chunks = parser.chunk_tokens(text)
 
     assert len(chunks) <= max_chunks
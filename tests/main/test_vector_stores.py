@@ -1,13 +1,15 @@
+import os
+from functools import lru_cache
 from types import SimpleNamespace
-from typing import List
+from typing import Dict, List, Tuple
 
 import pytest
 from dotenv import load_dotenv
 
+from langroid.embedding_models.base import EmbeddingModel
 from langroid.embedding_models.models import OpenAIEmbeddingsConfig
-from langroid.mytypes import DocMetaData, Document
+from langroid.mytypes import DocMetaData, Document, Embeddings
 from langroid.parsing.parser import Parser, ParsingConfig, Splitter
-from langroid.utils.system import rmdir
 from langroid.vector_store.base import VectorStore
 from langroid.vector_store.chromadb import ChromaDB, ChromaDBConfig
 from langroid.vector_store.lancedb import LanceDB, LanceDBConfig
@@ -18,8 +20,17 @@ from langroid.vector_store.qdrantdb import QdrantDB, QdrantDBConfig
 load_dotenv()
 embed_cfg = OpenAIEmbeddingsConfig(
     model_type="openai",
+    cache_size=1000,  # the same queries are embedded for each vecdb backend
 )
 
+# pytest-xdist worker id ("gw0" when not running under xdist): storage paths and
+# collection names are suffixed with it, so that parallel workers never write to
+# the same local storage dir, or the same collection on a shared server.
+worker_id = os.environ.get("PYTEST_XDIST_WORKER", "gw0")
+coll_name = f"test-{worker_id}-{embed_cfg.model_type}"
+context_coll_name = f"test-{worker_id}-context-window"
+junk_coll_prefix = f"test_junk_{worker_id}"
+
 phrases = SimpleNamespace(
     HELLO="hello",
     HI_THERE="hi there",
@@ -47,52 +58,104 @@ stored_docs = [
 ]
 
 
-@pytest.fixture(scope="function")
+@lru_cache
+def stored_docs_embeddings() -> Embeddings:
+    """
+    Embed `stored_docs` once per session, and share the vectors across all
+    vecdb backends via `add_embeddings`.
+    """
+    embedding_fn = EmbeddingModel.create(embed_cfg).embedding_fn()
+    return embedding_fn([d.content for d in stored_docs])
+
+
+def ensure_stored_docs(vecdb: VectorStore) -> None:
+    """
+    The `vecdb` fixture is module-scoped, and some tests switch to (or clear)
+    other collections, so point the vecdb back at the collection of
+    `stored_docs`, and only (re-)ingest them if that collection is empty.
+    (`create_collection` without `replace` is a get-or-create, and unlike
+    `set_collection`, it also re-points e.g. ChromaDB's `collection` when the
+    collection already exists.)
+    """
+    vecdb.create_collection(coll_name)
+    if coll_name not in vecdb.list_collections(empty=False):
+        try:
+            vecdb.add_embeddings(stored_docs, stored_docs_embeddings())
+        except NotImplementedError:
+            vecdb.add_documents(stored_docs)
+
+
+def delete_test_collections(vecdb: VectorStore) -> None:
+    """Teardown: delete the collections that tests in this module create."""
+    existing = vecdb.list_collections(empty=True)
+    for name in [coll_name, context_coll_name]:
+        if name in existing:
+            vecdb.delete_collection(collection_name=name)
+
+
+def vecdb_params(*backends: str) -> List:
+    """
+    Params for the indirect `vecdb` fixture. Each backend is pinned to its own
+    pytest-xdist group, so with `pytest -n auto --dist loadgroup` the backends
+    run in parallel on separate workers, while all tests on a given backend run
+    on the same worker (no concurrent writes to the same storage).
+    """
+    return [pytest.param(b, marks=pytest.mark.xdist_group(name=b)) for b in backends]
+
+
+# module-scoped so the vecdb is built and `stored_docs` are embedded and
+# ingested only once per backend, rather than once per test
+@pytest.fixture(scope="module")
 def vecdb(request) -> VectorStore:
     if request.param == "qdrant_local":
         qd_dir = ":memory:"
         qd_cfg = QdrantDBConfig(
             cloud=False,
-            collection_name="test-" + embed_cfg.model_type,
+            collection_name=coll_name,
             storage_path=qd_dir,
             embedding=embed_cfg,
+            hnsw_m=0,  # tiny collection: skip HNSW index, use full scan
+            wait_on_upsert=False,  # in-memory local client, nothing to wait for
         )
         qd = QdrantDB(qd_cfg)
-        qd.add_documents(stored_docs)
+        qd.add_embeddings(stored_docs, stored_docs_embeddings())
         yield qd
         return
 
     if request.param == "qdrant_cloud":
-        qd_dir = ".qdrant/cloud/" + embed_cfg.model_type
+        qd_dir = f".qdrant/cloud/{worker_id}/{embed_cfg.model_type}"
         qd_cfg_cloud = QdrantDBConfig(
             cloud=True,
-            collection_name="test-" + embed_cfg.model_type,
+            collection_name=coll_name,
             storage_path=qd_dir,
             embedding=embed_cfg,
+            hnsw_m=0,  # tiny collection: skip HNSW index, use full scan
+            prefer_grpc=True,
         )
         qd_cloud = QdrantDB(qd_cfg_cloud)
-        qd_cloud.add_documents(stored_docs)
+        qd_cloud.add_embeddings(stored_docs, stored_docs_embeddings())
         yield qd_cloud
-        qd_cloud.delete_collection(collection_name=qd_cfg_cloud.collection_name)
+        delete_test_collections(qd_cloud)
         return
 
     if request.param == "chroma":
-        cd_dir = ".chroma/" + embed_cfg.model_type
-        rmdir(cd_dir)
+        cd_dir = f".chroma/{worker_id}/{embed_cfg.model_type}"
         cd_cfg = ChromaDBConfig(
-            collection_name="test-" + embed_cfg.model_type,
+            collection_name=coll_name,
             storage_path=cd_dir,
             embedding=embed_cfg,
+            replace_collection=True,  # start fresh without wiping the storage dir
+            shared_client=True,
         )
         cd = ChromaDB(cd_cfg)
-        cd.add_documents(stored_docs)
+        cd.add_embeddings(stored_docs, stored_docs_embeddings())
         yield cd
-        rmdir(cd_dir)
+        delete_test_collections(cd)
         return
 
     if request.param == "meilisearch":
         ms_cfg = MeiliSearchConfig(
-            collection_name="test-meilisearch",
+            collection_name=f"test-{worker_id}-meilisearch",
         )
         ms = MeiliSearch(ms_cfg)
         ms.add_documents(stored_docs)
@@ -102,7 +165,7 @@ def vecdb(request) -> VectorStore:
 
     if request.param == "momento":
         cfg = MomentoVIConfig(
-            collection_name="test-momento",
+            collection_name=f"test-{worker_id}-momento",
         )
         vdb = MomentoVI(cfg)
         vdb.add_documents(stored_docs)
@@ -110,49 +173,64 @@ def vecdb(request) -> VectorStore:
         vdb.delete_collection(collection_name=cfg.collection_name)
 
     if request.param == "lancedb":
-        ldb_dir = ".lancedb/data/" + embed_cfg.model_type
-        rmdir(ldb_dir)
+        ldb_dir = f".lancedb/data/{worker_id}/{embed_cfg.model_type}"
         ldb_cfg = LanceDBConfig(
             cloud=False,
-            collection_name="test-" + embed_cfg.model_type,
+            collection_name=coll_name,
             storage_path=ldb_dir,
             embedding=embed_cfg,
             document_class=MyDoc,  # IMPORTANT, to ensure table has full schema!
+            create_index=False,  # tiny table: flat search, no IVF_PQ training
+            replace_collection=True,  # start fresh without wiping the storage dir
         )
         ldb = LanceDB(ldb_cfg)
-        ldb.add_documents(stored_docs)
+        ldb.add_embeddings(stored_docs, stored_docs_embeddings())
         yield ldb
-        rmdir(ldb_dir)
+        delete_test_collections(ldb)
         return
 
 
-@pytest.mark.parametrize(
-    "query,results,exceptions",
-    [
-        ("which city is Belgium's capital?", [phrases.BELGIUM], ["meliseach"]),
-        ("capital of France", [phrases.FRANCE], ["meliseach"]),
-        ("hello", [phrases.HELLO], ["meliseach"]),
-        ("hi there", [phrases.HI_THERE], ["meliseach"]),
-        ("men and women over 40", [phrases.OVER_40], ["meilisearch"]),
-        ("people aged less than 40", [phrases.UNDER_40], ["meilisearch"]),
-        ("Canadian residents", [phrases.CANADA], ["meilisearch"]),
-        ("people outside Canada", [phrases.NOT_CANADA], ["meilisearch"]),
-    ],
-)
+search_cases = [
+    ("which city is Belgium's capital?", [phrases.BELGIUM], ["meliseach"]),
+    ("capital of France", [phrases.FRANCE], ["meliseach"]),
+    ("hello", [phrases.HELLO], ["meliseach"]),
+    ("hi there", [phrases.HI_THERE], ["meliseach"]),
+    ("men and women over 40", [phrases.OVER_40], ["meilisearch"]),
+    ("people aged less than 40", [phrases.UNDER_40], ["meilisearch"]),
+    ("Canadian residents", [phrases.CANADA], ["meilisearch"]),
+    ("people outside Canada", [phrases.NOT_CANADA], ["meilisearch"]),
+]
+
+
+@pytest.fixture(scope="module")
+def search_results(vecdb) -> Dict[str, List[Tuple[Document, float]]]:
+    """
+    Run all the `search_cases` queries against the vecdb in a single batched
+    search, and share the results across the per-query test cases.
+    """
+    ensure_stored_docs(vecdb)
+    queries = [query for query, _, _ in search_cases]
+    docs_scores_list = vecdb.similar_texts_with_scores_batch(
+        queries, k=len(vars(phrases))
+    )
+    return dict(zip(queries, docs_scores_list))
+
+
+@pytest.mark.parametrize("query,results,exceptions", search_cases)
 # add "momento" when their API docs are ready
 @pytest.mark.parametrize(
     "vecdb",
-    ["lancedb", "qdrant_cloud", "qdrant_local", "chroma"],
+    vecdb_params("lancedb", "qdrant_cloud", "qdrant_local", "chroma"),
     indirect=True,
 )
 def test_vector_stores_search(
-    vecdb, query: str, results: List[str], exceptions: List[str]
+    vecdb, search_results, query: str, results: List[str], exceptions: List[str]
 ):
     if vecdb.__class__.__name__.lower() in exceptions:
         # we don't expect some of these to work,
         # e.g. MeiliSearch is a text search engine, not a vector store
         return
-    docs_and_scores = vecdb.similar_texts_with_scores(query, k=len(vars(phrases)))
+    docs_and_scores = search_results[query]
     # first doc should be best match
     # scores are cosine similarities, so high means close
     matching_docs = [doc.content for doc, score in docs_and_scores if score > 0.7]
@@ -162,17 +240,15 @@ def test_vector_stores_search(
 # add "momento" when their API docs are ready.
 @pytest.mark.parametrize(
     "vecdb",
-    ["lancedb", "qdrant_local", "qdrant_cloud", "chroma"],
+    vecdb_params("lancedb", "qdrant_local", "qdrant_cloud", "chroma"),
     indirect=True,
 )
 def test_vector_stores_access(vecdb):
     assert vecdb is not None
 
-    coll_name = vecdb.config.collection_name
-    assert coll_name is not None
-
-    vecdb.delete_collection(collection_name=coll_name)
-    vecdb.create_collection(collection_name=coll_name)
+    # start from a fresh collection since the vecdb is shared across tests
+    vecdb.create_collection(collection_name=coll_name, replace=True)
+    assert vecdb.config.collection_name == coll_name
 
     vecdb.add_documents(stored_docs)
     all_docs = vecdb.get_all_documents()
@@ -182,19 +258,23 @@ def test_vector_stores_access(vecdb):
     docs = vecdb.get_documents_by_ids(ids[:3])
     assert len(docs) == 3
 
-    coll_names = [f"test_junk_{i}" for i in range(3)]
+    coll_names = [f"{junk_coll_prefix}_{i}" for i in range(3)]
     for coll in coll_names:
         vecdb.create_collection(collection_name=coll)
     n_colls = len(
-        [c for c in vecdb.list_collections(empty=True) if c.startswith("test_junk")]
+        [
+            c
+            for c in vecdb.list_collections(empty=True)
+            if c.startswith(junk_coll_prefix)
+        ]
     )
-    n_dels = vecdb.clear_all_collections(really=True, prefix="test_junk")
+    n_dels = vecdb.clear_all_collections(really=True, prefix=junk_coll_prefix)
     assert n_colls == n_dels
 
 
 @pytest.mark.parametrize(
     "vecdb",
-    ["qdrant_cloud", "lancedb", "chroma", "qdrant_local"],
+    vecdb_params("qdrant_cloud", "lancedb", "chroma", "qdrant_local"),
     indirect=True,
 )
 def test_vector_stores_context_window(vecdb):
@@ -223,7 +303,7 @@ def test_vector_stores_context_window(vecdb):
     parser = Parser(cfg)
     splits = parser.split([doc])
 
-    vecdb.create_collection(collection_name="test-context-window", replace=True)
+    vecdb.create_collection(collection_name=context_coll_name, replace=True)
     vecdb.add_documents(splits)
 
     # Test context window retrieval
@@ -252,7 +332,7 @@ def test_vector_stores_context_window(vecdb):
 
 @pytest.mark.parametrize(
     "vecdb",
-    ["lancedb", "chroma", "qdrant_cloud", "qdrant_local"],
+    vecdb_params("lancedb", "chroma", "qdrant_cloud", "qdrant_local"),
     indirect=True,
 )
 def test_vector_stores_overlapping_matches(vecdb):
@@ -292,14 +372,14 @@ def test_vector_stores_overlapping_matches(vecdb):
     parser = Parser(cfg)
     splits = parser.split([doc])
 
-    vecdb.create_collection(collection_name="test-context-window", replace=True)
+    vecdb.create_collection(collection_name=context_coll_name, replace=True)
     vecdb.add_documents(splits)
 
     # Test context window retrieval
     docs_scores = vecdb.similar_texts_with_scores("What are Giraffes like?", k=3)
     # We expect to retrieve a window of -2, +2 around each of the three Giraffe matches.
     # The first two windows will overlap, so they form a connected component,
-    # and we topological-sort and order the chunks in these windows, resulting in a
+    # and we order the chunks in these windows by position, resulting in a
     # single window. The third Giraffe-match context window will not overlap with
     # the other two, so we will have a total of 2 final docs_scores components.
     docs_scores = vecdb.add_context_window(docs_scores, neighbors=2)
@@ -319,3 +399,29 @@ def test_vector_stores_overlapping_matches(vecdb):
         indices = [content.find(p) for p in sentences]
         indices = [i for i in indices if i >= 0]
         assert indices == sorted(indices)
+
+
+@pytest.mark.parametrize(
+    "windows,expected",
+    [
+        ([], []),
+        ([["a", "b", "c"]], [["a", "b", "c"]]),
+        # overlapping windows (in either order) are merged, in text order
+        ([["a", "b", "c"], ["b", "c", "d"]], [["a", "b", "c", "d"]]),
+        ([["c", "d", "e"], ["a", "b", "c"]], [["a", "b", "c", "d", "e"]]),
+        # windows that only overlap via a third window form one group
+        (
+            [["a", "b"], ["d", "e"], ["b", "c", "d"]],
+            [["a", "b", "c", "d", "e"]],
+        ),
+        # merging two groups also pulls in windows merged into them earlier
+        (
+            [["e", "f"], ["a", "b", "c"], ["b"], ["c", "d", "e"]],
+            [["a", "b", "c", "d", "e", "f"]],
+        ),
+        # disjoint windows, e.g. from different docs, stay separate
+        ([["a", "b"], ["x", "y"], ["b", "c"]], [["a", "b", "c"], ["x", "y"]]),
+    ],
+)
+def test_remove_overlaps(windows, expected):
+    assert VectorStore.remove_overlaps(windows) == expected